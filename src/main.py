@@ -1,18 +1,39 @@
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Request
+from fastapi.responses import HTMLResponse, JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 from starlette.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr
+import redis.asyncio as aioredis
+from redis.exceptions import LockError
 import os
-import json
+import sys
+import logging
+import hashlib
+import orjson
 import asyncio
 import random
 import time
-from typing import List, Dict, Optional
-from datetime import datetime
+from typing import List, Dict, Set, Optional, Literal, Mapping
+from types import MappingProxyType
+from datetime import datetime, timezone
+from contextlib import asynccontextmanager
 
-app = FastAPI(title="AI vs AI Cyber Battle Platform", version="1.0.0")
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Each worker relays published battle events to its own websocket clients
+    reader = asyncio.create_task(pubsub_reader())
+    flusher = asyncio.create_task(vote_flusher())
+    yield
+    reader.cancel()
+    flusher.cancel()
+    # Let both tasks finish unwinding before their connections are closed
+    await asyncio.gather(reader, flusher, return_exceptions=True)
+    await redis.aclose()
+
+app = FastAPI(title="AI vs AI Cyber Battle Platform", version="1.0.0", lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -27,25 +48,67 @@ app.add_middleware(
 app.mount("/static", StaticFiles(directory="./static"), name="static")
 
 # WebSocket connection manager
+SEND_QUEUE_SIZE = 64
+
+class ClientChannel:
+    """Bounded outgoing queue and writer task for a single websocket"""
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SEND_QUEUE_SIZE)
+        self.dropped = 0
+        self.writer: Optional[asyncio.Task] = None
+
 class ConnectionManager:
     def __init__(self):
-        self.active_connections: List[WebSocket] = []
+        self.channels: Dict[WebSocket, ClientChannel] = {}
 
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
-        self.active_connections.append(websocket)
+        channel = ClientChannel(websocket)
+        channel.writer = asyncio.create_task(self._writer(channel))
+        self.channels[websocket] = channel
 
     def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+        channel = self.channels.pop(websocket, None)
+        if channel is None:
+            return
+        if channel.dropped:
+            logger.warning("Websocket client disconnected after %d dropped messages", channel.dropped)
+        if channel.writer is not asyncio.current_task():
+            channel.writer.cancel()
 
     async def send_personal_message(self, message: str, websocket: WebSocket):
         await websocket.send_text(message)
 
-    async def broadcast(self, message: str):
-        for connection in self.active_connections:
+    def broadcast(self, message: str):
+        """Queue for the websockets connected to this worker only.
+
+        Runs synchronously: the ASGI send event is built once and shared by
+        every queue. A slow client never holds up the others: when its queue
+        is full the oldest pending message is dropped. Clients spot the gap
+        from the event sequence numbers.
+        """
+        frame = {"type": "websocket.send", "text": message}
+        for channel in self.channels.values():
+            try:
+                channel.queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                channel.queue.get_nowait()
+                channel.queue.put_nowait(frame)
+                channel.dropped += 1
+
+    async def _writer(self, channel: ClientChannel):
+        websocket = channel.websocket
+        try:
+            while True:
+                frame = await channel.queue.get()
+                await websocket.send(frame)
+        except Exception:
+            self.disconnect(websocket)
             try:
-                await connection.send_text(message)
-            except:
+                await websocket.close()
+            except Exception:
+                # The socket is already gone
                 pass
 
 manager = ConnectionManager()
@@ -62,6 +125,34 @@ class BattleState(BaseModel):
     battle_log: List[Dict]
     is_active: bool
 
+    _cached_json: Optional[bytes] = PrivateAttr(default=None)
+    _attacker: Optional[Mapping] = PrivateAttr(default=None)
+    _defender: Optional[Mapping] = PrivateAttr(default=None)
+
+    @property
+    def attacker(self) -> Mapping:
+        """Resolved attacker persona, looked up once per loaded instance"""
+        if self._attacker is None:
+            self._attacker = ATTACKER_PERSONAS[self.attacker_persona]
+        return self._attacker
+
+    @property
+    def defender(self) -> Mapping:
+        """Resolved defender persona, looked up once per loaded instance"""
+        if self._defender is None:
+            self._defender = DEFENDER_PERSONAS[self.defender_persona]
+        return self._defender
+
+    def cached_json(self) -> bytes:
+        """Serialized state, reused until the battle is next mutated"""
+        if self._cached_json is None:
+            self._cached_json = orjson.dumps(self.model_dump())
+        return self._cached_json
+
+    def finish(self):
+        self.is_active = False
+        self._cached_json = None
+
 class Achievement(BaseModel):
     id: str
     name: str
@@ -80,46 +171,143 @@ class UserProfile(BaseModel):
     battles_participated: int
     votes_cast: int
 
-# In-memory storage (replace with database in production)
-battles: Dict[str, BattleState] = {}
-users: Dict[str, UserProfile] = {}
-current_battle_id: Optional[str] = None
+# Redis storage shared by all workers
+redis = aioredis.from_url(os.environ.get("REDIS_URL", "redis://localhost:6379/0"), decode_responses=True)
+
+# Battles expire after a day without activity, which bounds what Redis holds
+BATTLE_TTL = 24 * 3600
+CURRENT_BATTLE_KEY = "current_battle"
+BATTLE_SEQ_KEY = "battle:seq"
+
+def battle_key(battle_id: str) -> str:
+    return f"battle:{battle_id}"
+
+def votes_key(battle_id: str) -> str:
+    return f"battle:{battle_id}:votes"
+
+def log_key(battle_id: str) -> str:
+    return f"battle:{battle_id}:log"
+
+async def save_battle(battle: BattleState):
+    # Votes and the action log live only in their own keys so they can be updated atomically
+    state = battle.model_dump(exclude={"audience_votes", "battle_log"})
+    await redis.set(battle_key(battle.battle_id), orjson.dumps(state), ex=BATTLE_TTL)
+
+async def load_battle(battle_id: str, with_log: bool = True) -> Optional[BattleState]:
+    """Load a battle; without the log, battle_log is left empty"""
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.get(battle_key(battle_id))
+        pipe.hgetall(votes_key(battle_id))
+        if with_log:
+            pipe.lrange(log_key(battle_id), 0, -1)
+        raw, votes, *rest = await pipe.execute()
+    log = rest[0] if with_log else []
+    if raw is None:
+        return None
+    # Everything in Redis was written by us, so skip re-validation
+    data = orjson.loads(raw)
+    data["audience_votes"] = {option: int(count) for option, count in votes.items()}
+    data["battle_log"] = [orjson.loads(entry) for entry in log]
+    return BattleState.model_construct(**data)
+
+def battle_keys(battle_id: str) -> List[str]:
+    return [battle_key(battle_id), votes_key(battle_id), log_key(battle_id), CURRENT_BATTLE_KEY]
+
+async def append_battle_action(battle_id: str, action: Dict):
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.rpush(log_key(battle_id), orjson.dumps(action))
+        for key in battle_keys(battle_id):
+            pipe.expire(key, BATTLE_TTL)
+        await pipe.execute()
+
+# Count a vote only if the battle still exists, in a single server-side step
+VOTE_SCRIPT = redis.register_script("""
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return false
+end
+redis.call('HINCRBY', KEYS[2], ARGV[1], 1)
+for _, key in ipairs(KEYS) do
+    redis.call('EXPIRE', key, ARGV[2])
+end
+return redis.call('HGETALL', KEYS[2])
+""")
+
+async def record_vote(battle_id: str, option: str) -> Optional[Dict[str, int]]:
+    """Returns the full tally after the vote, or None if the battle is gone"""
+    flat = await VOTE_SCRIPT(keys=battle_keys(battle_id), args=[option, BATTLE_TTL])
+    if flat is None:
+        return None
+    return {flat[i]: int(flat[i + 1]) for i in range(0, len(flat), 2)}
+
+async def get_current_battle_id() -> Optional[str]:
+    return await redis.get(CURRENT_BATTLE_KEY)
+
+# Battle events fan out to every worker through Redis Pub/Sub
+EVENTS_CHANNEL = "battle_events"
+EVENTS_SEQ_KEY = "battle_events:seq"
+
+# Numbering and publishing in one script keeps seq order equal to delivery order
+PUBLISH_SCRIPT = redis.register_script("""
+local seq = redis.call('INCR', KEYS[1])
+return redis.call('PUBLISH', ARGV[1], '{"seq":' .. seq .. ',' .. string.sub(ARGV[2], 2))
+""")
+
+async def publish_event(event: Dict):
+    await PUBLISH_SCRIPT(keys=[EVENTS_SEQ_KEY], args=[EVENTS_CHANNEL, orjson.dumps(event)])
+
+async def pubsub_reader():
+    while True:
+        try:
+            async with redis.pubsub() as pubsub:
+                await pubsub.subscribe(EVENTS_CHANNEL)
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        manager.broadcast(message["data"])
+        except Exception:
+            # Connection to Redis lost; resubscribe after a short pause
+            await asyncio.sleep(1)
+
+def freeze_personas(personas: Dict[str, Dict]) -> MappingProxyType:
+    """Intern persona names and make the table read-only"""
+    for persona in personas.values():
+        persona["name"] = sys.intern(persona["name"])
+    return MappingProxyType(personas)
 
 # AI Personas
-ATTACKER_PERSONAS = {
+ATTACKER_PERSONAS = freeze_personas({
     "script_kiddie": {
         "name": "Script Kiddie",
         "description": "Novice hacker using basic tools",
         "threat_level": 1,
-        "techniques": ["Phishing", "Malware", "Social Engineering"]
+        "techniques": ("Phishing", "Malware", "Social Engineering")
     },
     "cybercriminal": {
         "name": "Cybercriminal",
         "description": "Organized crime member with moderate skills",
         "threat_level": 3,
-        "techniques": ["Ransomware", "Banking Trojans", "Credential Theft"]
+        "techniques": ("Ransomware", "Banking Trojans", "Credential Theft")
     },
     "apt_group": {
         "name": "APT Group",
         "description": "Advanced Persistent Threat with sophisticated methods",
         "threat_level": 7,
-        "techniques": ["Zero-day Exploits", "Living off the Land", "Supply Chain Attacks"]
+        "techniques": ("Zero-day Exploits", "Living off the Land", "Supply Chain Attacks")
     },
     "insider_threat": {
         "name": "Insider Threat",
         "description": "Malicious employee with privileged access",
         "threat_level": 5,
-        "techniques": ["Data Exfiltration", "Privilege Escalation", "Backdoor Installation"]
+        "techniques": ("Data Exfiltration", "Privilege Escalation", "Backdoor Installation")
     },
     "nation_state": {
         "name": "Nation-State Actor",
         "description": "State-sponsored cyber warfare unit",
         "threat_level": 10,
-        "techniques": ["Infrastructure Attacks", "Espionage", "Cyber Warfare"]
+        "techniques": ("Infrastructure Attacks", "Espionage", "Cyber Warfare")
     }
-}
+})
 
-DEFENDER_PERSONAS = {
+DEFENDER_PERSONAS = freeze_personas({
     "security_analyst": {
         "name": "Security Analyst",
         "description": "Front-line defender monitoring threats",
@@ -145,7 +333,7 @@ DEFENDER_PERSONAS = {
         "description": "Machine learning powered defense system",
         "strategy": "Automated threat detection and response"
     }
-}
+})
 
 SCENARIOS = {
     "hospital": {
@@ -175,6 +363,67 @@ SCENARIOS = {
     }
 }
 
+# Accepted values for starting a battle; FastAPI rejects anything else with a 422
+ScenarioName = Literal[tuple(SCENARIOS)]
+AttackerName = Literal[tuple(ATTACKER_PERSONAS)]
+DefenderName = Literal[tuple(DEFENDER_PERSONAS)]
+
+ACHIEVEMENTS = [
+    {"id": "first_vote", "name": "First Vote", "description": "Cast your first vote", "category": "participation", "rarity": "common"},
+    {"id": "battle_observer", "name": "Battle Observer", "description": "Watch a complete battle", "category": "engagement", "rarity": "common"},
+    {"id": "threat_spotter", "name": "Threat Spotter", "description": "Identify 10 attack techniques", "category": "knowledge", "rarity": "uncommon"},
+    {"id": "defense_expert", "name": "Defense Expert", "description": "Successfully defend against APT attack", "category": "skill", "rarity": "rare"},
+    {"id": "cyber_legend", "name": "Cyber Legend", "description": "Reach level 50", "category": "progression", "rarity": "legendary"}
+]
+
+# Mock leaderboard data
+LEADERBOARD = [
+    {"rank": 1, "username": "CyberGuardian", "level": 45, "experience": 12500, "battles": 89},
+    {"rank": 2, "username": "ThreatHunter", "level": 42, "experience": 11200, "battles": 76},
+    {"rank": 3, "username": "SecurityPro", "level": 38, "experience": 9800, "battles": 65},
+    {"rank": 4, "username": "DefenseExpert", "level": 35, "experience": 8900, "battles": 58},
+    {"rank": 5, "username": "CyberNinja", "level": 33, "experience": 8200, "battles": 52}
+]
+
+# Static payloads are serialized once at startup and served with an ETag
+STATIC_MAX_AGE = 3600
+
+def json_etag(body: bytes) -> str:
+    return f'"{hashlib.md5(body).hexdigest()}"'
+
+def prebuild_json(payload: Dict):
+    body = orjson.dumps(payload)
+    return body, json_etag(body)
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match uses weak comparison, so a W/ prefix (added e.g. by gzipping proxies) is ignored
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+def cached_json_response(request: Request, body: bytes, etag: str, max_age: int = STATIC_MAX_AGE) -> Response:
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={max_age}"}
+    if etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+SCENARIOS_JSON, SCENARIOS_ETAG = prebuild_json({"scenarios": SCENARIOS})
+PERSONAS_JSON, PERSONAS_ETAG = prebuild_json({
+    "attackers": dict(ATTACKER_PERSONAS),
+    "defenders": dict(DEFENDER_PERSONAS)
+})
+ACHIEVEMENTS_JSON, ACHIEVEMENTS_ETAG = prebuild_json({"achievements": ACHIEVEMENTS})
+
+# The leaderboard changes, so it is cached in Redis with a short TTL instead
+LEADERBOARD_CACHE_KEY = "lb:top100"
+LEADERBOARD_TTL = 30
+
+async def compute_leaderboard() -> List[Dict]:
+    # Mock data until the leaderboard is backed by the database
+    return LEADERBOARD
+
 # API Endpoints
 @app.get("/")
 async def read_root():
@@ -189,24 +438,53 @@ async def health_check():
     return {"status": "healthy", "message": "AI vs AI Cyber Battle Platform is running!"}
 
 @app.get("/api/scenarios")
-async def get_scenarios():
-    return {"scenarios": SCENARIOS}
+async def get_scenarios(request: Request):
+    return cached_json_response(request, SCENARIOS_JSON, SCENARIOS_ETAG)
 
 @app.get("/api/personas")
-async def get_personas():
-    return {
-        "attackers": ATTACKER_PERSONAS,
-        "defenders": DEFENDER_PERSONAS
-    }
+async def get_personas(request: Request):
+    return cached_json_response(request, PERSONAS_JSON, PERSONAS_ETAG)
+
+# Serializes battle starts within this worker; the Redis lock covers the others
+start_lock = asyncio.Lock()
+START_LOCK_KEY = "battle:start_lock"
+START_LOCK_TIMEOUT = 10
 
 @app.post("/api/battle/start")
-async def start_battle(scenario: str, attacker: str, defender: str):
-    global current_battle_id
+async def start_battle(scenario: ScenarioName, attacker: AttackerName, defender: DefenderName):
+    async with start_lock:
+        lock = redis.lock(START_LOCK_KEY, timeout=START_LOCK_TIMEOUT, blocking_timeout=START_LOCK_TIMEOUT)
+        if not await lock.acquire():
+            raise HTTPException(status_code=409, detail="Another battle is being started")
+        try:
+            return await create_battle(scenario, attacker, defender)
+        finally:
+            try:
+                await lock.release()
+            except LockError:
+                # The lock timed out during a slow start and has already expired
+                pass
+
+async def create_battle(scenario: str, attacker: str, defender: str) -> Response:
+    """Start a battle, or return the active one if it has the same setup"""
+    current_id = await get_current_battle_id()
+    current = await load_battle(current_id) if current_id else None
+    if current and current.is_active and \
+            (current.scenario, current.attacker_persona, current.defender_persona) == (scenario, attacker, defender):
+        return Response(
+            orjson.dumps({"message": "Battle already in progress", "battle_id": current.battle_id, "battle": orjson.Fragment(current.cached_json())}),
+            media_type="application/json"
+        )
     
-    battle_id = f"battle_{int(time.time())}"
-    current_battle_id = battle_id
+    # A different setup replaces the current battle, which ends it
+    if current and current.is_active:
+        current.finish()
+        await save_battle(current)
     
-    battle = BattleState(
+    battle_id = f"battle_{await redis.incr(BATTLE_SEQ_KEY)}"
+    
+    # Inputs are already validated by FastAPI, so skip model validation
+    battle = BattleState.model_construct(
         battle_id=battle_id,
         scenario=scenario,
         attacker_persona=attacker,
@@ -218,62 +496,98 @@ async def start_battle(scenario: str, attacker: str, defender: str):
         is_active=True
     )
     
-    battles[battle_id] = battle
+    await save_battle(battle)
+    await redis.set(CURRENT_BATTLE_KEY, battle_id, ex=BATTLE_TTL)
     
     # Broadcast battle start
-    await manager.broadcast(json.dumps({
+    state = orjson.Fragment(battle.cached_json())
+    await publish_event({
         "type": "battle_started",
-        "battle": battle.dict()
-    }))
+        "battle": state
+    })
     
-    return {"message": "Battle started", "battle_id": battle_id, "battle": battle}
+    return Response(
+        orjson.dumps({"message": "Battle started", "battle_id": battle_id, "battle": state}),
+        media_type="application/json"
+    )
 
 @app.get("/api/battle/current")
 async def get_current_battle():
-    if current_battle_id and current_battle_id in battles:
-        return {"battle": battles[current_battle_id]}
-    return {"battle": None}
+    battle_id = await get_current_battle_id()
+    battle = await load_battle(battle_id) if battle_id else None
+    return {"battle": battle}
+
+# Fixed-window vote limit per client address. Behind a load balancer uvicorn only
+# takes the address from X-Forwarded-For when the proxy is listed in
+# FORWARDED_ALLOW_IPS; otherwise every voter shares the proxy's bucket.
+VOTE_RATE_LIMIT = 20
+VOTE_RATE_WINDOW = 10
+
+async def allow_vote(client_ip: str) -> bool:
+    key = f"vote:{client_ip}:{int(time.time()) // VOTE_RATE_WINDOW}"
+    async with redis.pipeline(transaction=False) as pipe:
+        pipe.incr(key)
+        pipe.expire(key, VOTE_RATE_WINDOW)
+        count, _ = await pipe.execute()
+    return count <= VOTE_RATE_LIMIT
+
+# Vote updates are coalesced per worker and broadcast at most every flush interval.
+# Only the changed options are remembered; their counts are read fresh at flush
+# time so a late flush from one worker never rolls back a newer tally from another.
+VOTE_FLUSH_INTERVAL = 0.2
+pending_votes: Dict[str, Set[str]] = {}
+
+def queue_vote_update(battle_id: str, option: str):
+    pending_votes.setdefault(battle_id, set()).add(option)
+
+async def vote_flusher():
+    while True:
+        await asyncio.sleep(VOTE_FLUSH_INTERVAL)
+        batch = dict(pending_votes)
+        pending_votes.clear()
+        for battle_id, options in batch.items():
+            try:
+                options = list(options)
+                counts = await redis.hmget(votes_key(battle_id), options)
+                await publish_event({
+                    "type": "vote_update",
+                    "battle_id": battle_id,
+                    "delta": {option: int(count) for option, count in zip(options, counts) if count is not None}
+                })
+            except Exception:
+                # Redis unavailable; retry these options on the next flush
+                for option in options:
+                    queue_vote_update(battle_id, option)
 
 @app.post("/api/battle/vote")
-async def cast_vote(option: str, user_id: str = "anonymous"):
-    if not current_battle_id or current_battle_id not in battles:
-        raise HTTPException(status_code=404, detail="No active battle")
+async def cast_vote(request: Request, option: str, user_id: str = "anonymous"):
+    client_ip = request.client.host if request.client else "unknown"
+    if not await allow_vote(client_ip):
+        raise HTTPException(status_code=429, detail="Too many votes, slow down")
     
-    battle = battles[current_battle_id]
-    if option not in battle.audience_votes:
-        battle.audience_votes[option] = 0
-    battle.audience_votes[option] += 1
+    battle_id = await get_current_battle_id()
+    votes = await record_vote(battle_id, option) if battle_id else None
+    if votes is None:
+        raise HTTPException(status_code=404, detail="No active battle")
     
-    # Broadcast vote update
-    await manager.broadcast(json.dumps({
-        "type": "vote_update",
-        "votes": battle.audience_votes
-    }))
+    # Broadcast only the changed tally, batched with other recent votes
+    queue_vote_update(battle_id, option)
     
-    return {"message": "Vote cast successfully", "votes": battle.audience_votes}
+    return {"message": "Vote cast successfully", "votes": votes}
 
 @app.get("/api/achievements")
-async def get_achievements():
-    achievements = [
-        {"id": "first_vote", "name": "First Vote", "description": "Cast your first vote", "category": "participation", "rarity": "common"},
-        {"id": "battle_observer", "name": "Battle Observer", "description": "Watch a complete battle", "category": "engagement", "rarity": "common"},
-        {"id": "threat_spotter", "name": "Threat Spotter", "description": "Identify 10 attack techniques", "category": "knowledge", "rarity": "uncommon"},
-        {"id": "defense_expert", "name": "Defense Expert", "description": "Successfully defend against APT attack", "category": "skill", "rarity": "rare"},
-        {"id": "cyber_legend", "name": "Cyber Legend", "description": "Reach level 50", "category": "progression", "rarity": "legendary"}
-    ]
-    return {"achievements": achievements}
+async def get_achievements(request: Request):
+    return cached_json_response(request, ACHIEVEMENTS_JSON, ACHIEVEMENTS_ETAG)
 
 @app.get("/api/leaderboard")
-async def get_leaderboard():
-    # Mock leaderboard data
-    leaderboard = [
-        {"rank": 1, "username": "CyberGuardian", "level": 45, "experience": 12500, "battles": 89},
-        {"rank": 2, "username": "ThreatHunter", "level": 42, "experience": 11200, "battles": 76},
-        {"rank": 3, "username": "SecurityPro", "level": 38, "experience": 9800, "battles": 65},
-        {"rank": 4, "username": "DefenseExpert", "level": 35, "experience": 8900, "battles": 58},
-        {"rank": 5, "username": "CyberNinja", "level": 33, "experience": 8200, "battles": 52}
-    ]
-    return {"leaderboard": leaderboard}
+async def get_leaderboard(request: Request):
+    cached = await redis.get(LEADERBOARD_CACHE_KEY)
+    if cached is not None:
+        body = cached.encode()
+    else:
+        body = orjson.dumps({"leaderboard": await compute_leaderboard()})
+        await redis.set(LEADERBOARD_CACHE_KEY, body, ex=LEADERBOARD_TTL)
+    return cached_json_response(request, body, json_etag(body), max_age=LEADERBOARD_TTL)
 
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
@@ -281,59 +595,78 @@ async def websocket_endpoint(websocket: WebSocket):
     try:
         while True:
             data = await websocket.receive_text()
-            message = json.loads(data)
+            message = orjson.loads(data)
             
             if message["type"] == "battle_action":
                 # Simulate AI battle progression
-                if current_battle_id and current_battle_id in battles:
-                    battle = battles[current_battle_id]
-                    
+                battle_id = await get_current_battle_id()
+                # The log is not needed here, so skip reading it on every action
+                battle = await load_battle(battle_id, with_log=False) if battle_id else None
+                if battle:
                     # Generate AI action based on personas and audience votes
                     action = await generate_ai_action(battle, message.get("user_input"))
-                    battle.battle_log.append(action)
+                    await append_battle_action(battle_id, action)
                     
-                    # Broadcast action to all connected clients
-                    await manager.broadcast(json.dumps({
+                    # Broadcast the new action; clients append it to the log they already hold
+                    await publish_event({
                         "type": "battle_action",
                         "action": action,
-                        "battle_state": battle.dict()
-                    }))
+                        "battle_state": battle.model_dump(exclude={"battle_log"})
+                    })
             
     except WebSocketDisconnect:
         manager.disconnect(websocket)
 
+# Dedicated generator for battle simulation, independent of the global random state
+rng = random.Random()
+ACTION_TYPES = ("attack", "defend", "reconnaissance", "escalation")
+
 async def generate_ai_action(battle: BattleState, user_input: Optional[str] = None):
+    """Generate AI action off the event loop so a slow model never stalls broadcasts"""
+    return await asyncio.to_thread(generate_ai_action_sync, battle, user_input)
+
+def generate_ai_action_sync(battle: BattleState, user_input: Optional[str] = None):
     """Generate AI action based on current battle state and user input"""
-    attacker = ATTACKER_PERSONAS[battle.attacker_persona]
-    defender = DEFENDER_PERSONAS[battle.defender_persona]
+    attacker = battle.attacker
+    defender = battle.defender
+    timestamp = datetime.now(timezone.utc).isoformat(timespec="milliseconds")
     
     # Simulate AI decision making
-    action_type = random.choice(["attack", "defend", "reconnaissance", "escalation"])
+    action_type = rng.choice(ACTION_TYPES)
     
     if action_type == "attack":
-        technique = random.choice(attacker["techniques"])
+        technique = rng.choice(attacker["techniques"])
         action = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": timestamp,
             "type": "attack",
             "actor": attacker["name"],
             "technique": technique,
             "description": f"{attacker['name']} launches {technique} attack",
             "threat_level": attacker["threat_level"],
-            "success_probability": random.uniform(0.3, 0.9)
+            "success_probability": rng.uniform(0.3, 0.9)
         }
     else:
         action = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": timestamp,
             "type": "defense",
             "actor": defender["name"],
             "strategy": defender["strategy"],
             "description": f"{defender['name']} implements {defender['strategy']}",
-            "effectiveness": random.uniform(0.4, 0.95)
+            "effectiveness": rng.uniform(0.4, 0.95)
         }
     
     return action
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Workers share state through Redis, so any number of them can serve clients
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="uvloop",
+        http="httptools",
+        ws="websockets",
+        workers=int(os.environ.get("WEB_CONCURRENCY", 4))
+    )
 